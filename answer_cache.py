@@ -0,0 +1,113 @@
+# answer_cache.py
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from instrumentation import metrics, Counter
+
+CACHE_LOOKUPS = metrics.register(Counter(
+    "ai_tools_answer_cache_lookups_total", "Answer cache lookups for general answers.", ("result",)))
+
+# Filler that can differ between two wordings of the same question. Kept deliberately small:
+# pronouns ("my" vs "your"), negations, question words, prepositions and tense-carrying verbs
+# are NOT in here, since any of them can change what is being asked or whose data it is about.
+STOPWORDS = frozenset({
+    "a", "an", "the", "of", "is", "are", "am", "be", "s", "do", "does",
+    "can", "could", "would", "will", "please", "pls", "kindly", "tell", "just",
+    "hi", "hey", "hello", "thanks", "thank",
+})
+
+# Words that point back at earlier turns ("make it shorter", "what about the second one").
+REFERENTIAL_WORDS = frozenset({
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "he", "she", "him", "her",
+    "above", "previous", "earlier", "again", "shorter", "longer", "more", "less", "instead",
+    "same", "another", "else", "last", "one", "ones",
+})
+_FOLLOW_UP_OPENERS = frozenset({"and", "but", "so", "then", "now", "also"})
+
+
+def normalize(query: str) -> str:
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def content_tokens(normalized: str) -> list[str]:
+    return [word for word in normalized.split() if word not in STOPWORDS]
+
+
+def cache_key(query: str) -> str:
+    """The question's content words in order; a query made only of filler keys on its full text."""
+    normalized = normalize(query)
+    return " ".join(content_tokens(normalized)) or normalized
+
+
+def is_self_contained(query: str) -> bool:
+    """Heuristic: False when the query likely depends on earlier turns, so a cached answer can't apply."""
+    words = normalize(query).split()
+    if words and (words[0] in _FOLLOW_UP_OPENERS or words[:2] in (["what", "about"], ["how", "about"])):
+        return False
+    return not any(word in REFERENTIAL_WORDS for word in words)
+
+
+class AnswerCache:
+    """
+    Reuses recent general-fallback answers for repeated questions.
+
+    A question is keyed on its content words in order: case, Unicode forms and punctuation are
+    normalized and a short list of filler words is dropped, so "What's the capital of France,
+    please?" finds the answer to "what is the capital of France". Any other difference, even a
+    single word ("bacterial" vs "viral", "my" vs "your") or digit, is a miss. Entries expire
+    after `ttl_seconds` and the least recently used one is evicted when the cache is full.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()  # key -> (answer, created)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "AnswerCache | None":
+        if os.environ.get("ANSWER_CACHE_ENABLED", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(
+            max_entries=int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+            ttl_seconds=float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    def lookup(self, query: str) -> str | None:
+        key = cache_key(query)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        CACHE_LOOKUPS.inc(result="hit")
+        return entry[0]
+
+    def store(self, query: str, answer: str):
+        key = cache_key(query)
+        if not key or not answer:
+            return
+        self._entries[key] = (answer, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
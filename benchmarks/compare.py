@@ -0,0 +1,54 @@
+# benchmarks/compare.py
+"""
+Compares two benchmark result files and flags regressions.
+
+    python benchmarks/compare.py benchmarks/results/microbench-A.json benchmarks/results/microbench-B.json --threshold 10
+
+Every numeric `*_ms` / `*_seconds` field found in both files is compared; the exit code is 1
+when any of them got slower by more than the threshold (in percent).
+"""
+import sys
+import json
+import argparse
+
+
+def _flatten(node, prefix: str = "") -> dict[str, float]:
+    values = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            values.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        values[prefix] = float(node)
+    return values
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list[dict]:
+    before, after = _flatten(baseline["results"]), _flatten(candidate["results"])
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        if not key.endswith(("_ms", "_seconds")) or before[key] == 0:
+            continue
+        change = (after[key] - before[key]) / before[key] * 100
+        rows.append({"metric": key, "before": before[key], "after": after[key], "change_pct": round(change, 1), "regression": change > threshold})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        marker = "❌" if row["regression"] else "  "
+        print(f"{marker} {row['metric']:<60} {row['before']:>12.3f} -> {row['after']:>12.3f}  ({row['change_pct']:+.1f}%)")
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\n{len(regressions)} regression(s) above {args.threshold}% out of {len(rows)} metrics.")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,97 @@
+# benchmarks/fake_llm_server.py
+"""
+Offline stand-in for the Groq OpenAI-compatible API.
+
+    python benchmarks/fake_llm_server.py --port 9000 --latency-ms 300 --tokens-per-second 250
+
+Point the app at it with LLM_BASE_URL=http://127.0.0.1:9000/v1 (any GROQ_API_KEY value works).
+Replies take `latency + completion_tokens / tokens_per_second`. When the request carries tools,
+messages mentioning a known keyword get a canned tool call so the tool paths are exercised too.
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# keyword in the user's message -> (tool name, arguments)
+CANNED_TOOL_CALLS = [
+    ("forecast", "financial_forecasting_tool", {"historical_data": [110, 125, 150, 142, 168, 180], "data_name": "New User Signups", "forecast_periods": 4}),
+    ("password", "customer_support_tool", {"customer_query": "How do I reset my password?"}),
+    ("categorize", "inbox_zero_tool", {"subject": "URGENT: Action Required", "sender": "billing@example.com"}),
+    ("meeting", "virtual_employee_tool", {"topic": "Quarterly review", "attendees": ["jane.doe@example.com"], "date_time": "Friday 10am"}),
+    ("log interaction", "crm_logging_tool", {"customer_email": "jane.doe@example.com", "topic": "Pricing call"}),
+]
+
+WORDS = "the quick brown fox jumps over the lazy dog while our assistant answers".split()
+
+config = argparse.Namespace(latency_ms=300.0, jitter_ms=50.0, tokens_per_second=250.0, completion_tokens=64)
+app = FastAPI()
+stats = {"requests": 0, "tool_calls": 0}
+
+
+def _last_user_text(messages: list[dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            return content if isinstance(content, str) else json.dumps(content)
+    return ""
+
+
+def _pick_tool_call(body: dict) -> dict | None:
+    offered = {tool.get("function", {}).get("name") for tool in body.get("tools") or []}
+    text = _last_user_text(body.get("messages", [])).lower()
+    for keyword, name, args in CANNED_TOOL_CALLS:
+        if keyword in text and name in offered:
+            return {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+    return None
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if body.get("stream"):
+        return JSONResponse({"error": {"message": "streaming is not supported by the fake server"}}, status_code=400)
+
+    stats["requests"] += 1
+    tool_call = _pick_tool_call(body)
+    completion_tokens = 16 if tool_call else config.completion_tokens
+    delay = max(0.0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+    await asyncio.sleep(delay + completion_tokens / config.tokens_per_second)
+
+    message = {"role": "assistant", "content": None if tool_call else " ".join(random.choices(WORDS, k=completion_tokens))}
+    if tool_call:
+        stats["tool_calls"] += 1
+        message["tool_calls"] = [tool_call]
+    prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms, help="time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=config.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=config.completion_tokens)
+    args = parser.parse_args()
+    for key in ("latency_ms", "jitter_ms", "tokens_per_second", "completion_tokens"):
+        setattr(config, key, getattr(args, key))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
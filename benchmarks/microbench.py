@@ -0,0 +1,131 @@
+# benchmarks/microbench.py
+"""
+Microbenchmarks for the tool hot paths (no LLM needed).
+
+    python benchmarks/microbench.py                      # everything
+    python benchmarks/microbench.py --only forecast_data categorize_email --repeat 50
+
+Also records the cold import time of each module, measured in a fresh interpreter so it
+doesn't depend on which benchmarks ran before it. extract_text_from_video runs on copies of
+the sample clips in static/videos, because the function deletes its input file.
+"""
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+import importlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import REPO_ROOT, summarize, time_call, write_results
+
+# The tool modules use paths relative to the repo root (static/, the Vosk model).
+sys.path.insert(0, REPO_ROOT)
+os.chdir(REPO_ROOT)
+
+SAMPLE_HISTORY = [110, 125, 150, 142, 168, 180, 176, 190, 205, 198, 221, 234]
+SAMPLE_CLIPS = sorted(glob.glob(os.path.join("static", "videos", "*.mp4")))
+
+
+_IMPORT_SNIPPET = (
+    "import time, importlib; start = time.perf_counter(); importlib.import_module({name!r}); "
+    "print('IMPORT_SECONDS', time.perf_counter() - start)"
+)
+
+
+def _cold_import_seconds(module_name: str) -> float:
+    completed = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET.format(name=module_name)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    # The modules print while importing, so pick out our marker line.
+    marker = next(line for line in completed.stdout.splitlines() if line.startswith("IMPORT_SECONDS"))
+    return float(marker.split()[1])
+
+
+def _import(module_name: str):
+    import_seconds = _cold_import_seconds(module_name)
+    return importlib.import_module(module_name), import_seconds
+
+
+def bench_forecast_data(repeat: int) -> dict:
+    module, import_seconds = _import("mcp_servers.forecasting_server")
+    samples = time_call(lambda: module.forecast_data(historical_data=SAMPLE_HISTORY, data_name="Signups", forecast_periods=4), repeat)
+    return {"import_seconds": round(import_seconds, 4), "latency": summarize(samples)}
+
+
+def bench_categorize_email(repeat: int) -> dict:
+    module, import_seconds = _import("mcp_servers.inbox_server")
+    samples = time_call(lambda: module.categorize_email(subject="Your invoice #1234 is due", sender="billing@example.com"), repeat * 10)
+    return {"import_seconds": round(import_seconds, 4), "latency": summarize(samples)}
+
+
+def bench_get_support_answer(repeat: int) -> dict:
+    module, import_seconds = _import("mcp_servers.support_server")
+    samples = time_call(lambda: module.get_support_answer(customer_query="how can I reset my password"), repeat * 10)
+    return {"import_seconds": round(import_seconds, 4), "latency": summarize(samples)}
+
+
+def bench_create_slide_image(repeat: int) -> dict:
+    module, import_seconds = _import("mcp_servers.video_server")
+    line = "Our product helps busy teams ship faster with fewer meetings and clearer priorities."
+    return {
+        "import_seconds": round(import_seconds, 4),
+        "title": summarize(time_call(lambda: module._create_slide_image("Product Launch", "title"), repeat)),
+        "normal": summarize(time_call(lambda: module._create_slide_image(line, "normal"), repeat)),
+    }
+
+
+def bench_extract_text_from_video(repeat: int, clips: int) -> dict:
+    module, import_seconds = _import("mcp_servers.video_processing")
+    per_clip = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for clip in SAMPLE_CLIPS[:clips]:
+            samples = []
+            # Transcription is slow, so it runs once per clip regardless of --repeat.
+            copy = os.path.join(workdir, os.path.basename(clip))
+            shutil.copyfile(clip, copy)
+            start = time.perf_counter()
+            text = module.extract_text_from_video(copy)
+            samples.append(time.perf_counter() - start)
+            per_clip[os.path.basename(clip)] = {
+                "bytes": os.path.getsize(clip),
+                "transcript_chars": len(text),
+                "latency": summarize(samples),
+            }
+    return {"import_seconds": round(import_seconds, 4), "clips": per_clip}
+
+
+BENCHMARKS = {
+    "forecast_data": bench_forecast_data,
+    "categorize_email": bench_categorize_email,
+    "get_support_answer": bench_get_support_answer,
+    "_create_slide_image": bench_create_slide_image,
+    "extract_text_from_video": bench_extract_text_from_video,
+}
+
+
+def main(args):
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"▶ {name}")
+        kwargs = {"clips": args.clips} if name == "extract_text_from_video" else {}
+        try:
+            results[name] = BENCHMARKS[name](args.repeat, **kwargs)
+        except Exception as e:
+            # Keep going so one missing dependency or model doesn't lose the whole run.
+            print(f"  ✗ {name} failed: {e!r}")
+            results[name] = {"error": repr(e)}
+    write_results("microbench", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=20, help="iterations per benchmark (x10 for the sub-millisecond ones)")
+    parser.add_argument("--clips", type=int, default=len(SAMPLE_CLIPS), help="number of sample clips to transcribe")
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/microbench-<timestamp>.json)")
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+# benchmarks/ws_load.py
+"""
+WebSocket load generator for /ws/{client_id}.
+
+    python benchmarks/ws_load.py --url ws://127.0.0.1:8000 --clients 50 --messages 10
+
+Each simulated client opens its own socket, sends chat turns one after another and measures
+the time until the reply arrives. Use together with
+fake_llm_server.py to run fully offline.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import summarize, write_results
+
+# (kind, message) — the keywords match fake_llm_server.CANNED_TOOL_CALLS
+MESSAGE_MIX = [
+    ("general", "What are some tips for writing a good cold email?"),
+    ("general", "Explain the difference between revenue and profit."),
+    ("forecast", "Forecast our signups for the next 4 months: 110, 125, 150, 142, 168, 180"),
+    ("support", "How do I reset my password?"),
+    ("inbox", "Please categorize this email: 'URGENT: Action Required' from billing@example.com"),
+    ("meeting", "Schedule a meeting with jane.doe@example.com on Friday at 10am"),
+]
+
+
+async def run_client(url: str, messages: int, think_time: float, timeout: float, latencies: dict, errors: list):
+    client_id = f"bench-{uuid.uuid4().hex[:8]}"
+    async with websockets.connect(f"{url}/ws/{client_id}", max_size=None) as ws:
+        for _ in range(messages):
+            kind, text = random.choice(MESSAGE_MIX)
+            start = time.perf_counter()
+            await ws.send(json.dumps({"type": "text_message", "content": text}))
+            try:
+                reply = json.loads(await asyncio.wait_for(ws.recv(), timeout=timeout))
+            except asyncio.TimeoutError:
+                # A late reply would be mistaken for the next turn's, so stop this client.
+                errors.append({"kind": kind, "error": "timeout"})
+                return
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            content = str(reply.get("payload", {}).get("content", ""))
+            if content.startswith("**Error:**"):
+                errors.append({"kind": kind, "error": content[:200]})
+            if think_time:
+                await asyncio.sleep(random.uniform(0, 2 * think_time))
+
+
+async def main(args):
+    latencies: dict[str, list[float]] = {}
+    errors: list[dict] = []
+    start = time.perf_counter()
+    clients = [run_client(args.url, args.messages, args.think_time_ms / 1000, args.timeout, latencies, errors) for _ in range(args.clients)]
+    outcomes = await asyncio.gather(*clients, return_exceptions=True)
+    wall = time.perf_counter() - start
+
+    failed_clients = [repr(o) for o in outcomes if isinstance(o, BaseException)]
+    all_samples = [s for samples in latencies.values() for s in samples]
+    results = {
+        "wall_seconds": round(wall, 3),
+        "turns_completed": len(all_samples),
+        "turns_per_second": round(len(all_samples) / wall, 3) if wall else None,
+        "latency": summarize(all_samples),
+        "latency_by_kind": {kind: summarize(samples) for kind, samples in sorted(latencies.items())},
+        "error_count": len(errors),
+        "errors": errors[:20],
+        "failed_clients": failed_clients[:20],
+    }
+    print(json.dumps({k: results[k] for k in ("turns_completed", "turns_per_second", "latency", "error_count")}, indent=2))
+    write_results("ws_load", results, vars(args), args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=5, help="chat turns per client")
+    parser.add_argument("--think-time-ms", type=float, default=0.0, help="mean pause between a client's turns")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for each reply")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/ws_load-<timestamp>.json)")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main(args))
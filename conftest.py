@@ -0,0 +1 @@
+# Lets `pytest` import the top-level modules (answer_cache, instrumentation, ...) from the repo root.
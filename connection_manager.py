@@ -0,0 +1,171 @@
+# connection_manager.py
+import os
+import asyncio
+import traceback
+from typing import Awaitable, Callable
+from fastapi import WebSocket
+from instrumentation import timed
+
+SEND_QUEUE_SIZE = int(os.environ.get("WS_SEND_QUEUE_SIZE", "100"))
+SEND_TIMEOUT = float(os.environ.get("WS_SEND_TIMEOUT", "10"))
+
+DeliverFn = Callable[[str, str], Awaitable[None]]
+
+
+# --- Broker backends ---
+# A broker carries `send_personal_message` calls to whichever process holds the client's
+# socket. Each backend calls `deliver(client_id, message)` in every process that should
+# try a local delivery; processes that don't hold the socket simply ignore it.
+
+class InProcessBroker:
+    """Delivers straight to this process's connections. Only correct with a single worker."""
+
+    async def start(self, deliver: DeliverFn):
+        self._deliver = deliver
+
+    async def publish(self, client_id: str, message: str):
+        await self._deliver(client_id, message)
+
+    async def close(self):
+        pass
+
+
+class RedisBroker:
+    """
+    Fans messages out over Redis pub/sub so any worker can reach any client.
+    Works with any Redis-compatible server (Redis, Valkey, KeyDB), including over a unix socket.
+    """
+    CHANNEL_PREFIX = "ws:client:"
+
+    def __init__(self, url: str):
+        self.url = url
+        self._redis = None
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+
+    async def start(self, deliver: DeliverFn):
+        import redis.asyncio as redis  # optional dependency, only needed for multi-worker setups
+
+        self._redis = redis.from_url(self.url, decode_responses=True)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        self._listener = asyncio.create_task(self._listen(deliver))
+        print(f"✅ Connection broker subscribed via {self.url}")
+
+    async def _listen(self, deliver: DeliverFn):
+        while True:
+            try:
+                async for item in self._pubsub.listen():
+                    if item["type"] != "pmessage":
+                        continue
+                    client_id = item["channel"][len(self.CHANNEL_PREFIX):]
+                    await deliver(client_id, item["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Connection broker listener error, retrying: {e}")
+                await asyncio.sleep(1)
+
+    async def publish(self, client_id: str, message: str):
+        await self._redis.publish(f"{self.CHANNEL_PREFIX}{client_id}", message)
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+        if self._pubsub:
+            await self._pubsub.close()
+        if self._redis:
+            await self._redis.close()
+
+
+def create_broker(url: str | None = None):
+    """Picks a backend from CONNECTION_BROKER_URL: unset or memory:// = in-process, redis:// / unix:// = Redis."""
+    url = url if url is not None else os.environ.get("CONNECTION_BROKER_URL", "")
+    if not url or url.startswith("memory://"):
+        return InProcessBroker()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported CONNECTION_BROKER_URL: {url}")
+
+
+# --- Per-client connection state ---
+class ClientConnection:
+    """A WebSocket plus its bounded outgoing queue, drained by a dedicated sender task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.dropped_messages = 0
+        self.tasks: list[asyncio.Task] = []
+
+    def enqueue(self, message: str):
+        # A slow client only ever fills its own queue; when full we drop its oldest message.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped_messages += 1
+        self.queue.put_nowait(message)
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+
+
+class ConnectionManager:
+    def __init__(self, broker=None, queue_size: int = SEND_QUEUE_SIZE):
+        self.active_connections: dict[str, ClientConnection] = {}
+        self.broker = broker or InProcessBroker()
+        self.queue_size = queue_size
+
+    async def start(self):
+        await self.broker.start(self._deliver_local)
+
+    async def stop(self):
+        for connection in list(self.active_connections.values()):
+            connection.close()
+        self.active_connections.clear()
+        await self.broker.close()
+
+    async def connect(self, websocket: WebSocket, client_id: str):
+        await websocket.accept()
+        previous = self.active_connections.get(client_id)
+        if previous:
+            previous.close()
+
+        connection = ClientConnection(websocket, self.queue_size)
+        connection.tasks.append(asyncio.create_task(self._sender(client_id, connection)))
+        self.active_connections[client_id] = connection
+
+    def disconnect(self, client_id: str, websocket: WebSocket | None = None):
+        connection = self.active_connections.get(client_id)
+        if not connection:
+            return
+        # A stale handler must not tear down a newer connection that reused the same client_id.
+        if websocket is not None and connection.websocket is not websocket:
+            return
+        del self.active_connections[client_id]
+        connection.close()
+
+    async def send_personal_message(self, message: str, client_id: str):
+        await self.broker.publish(client_id, message)
+
+    async def _deliver_local(self, client_id: str, message: str):
+        connection = self.active_connections.get(client_id)
+        if connection:
+            connection.enqueue(message)
+
+    async def _sender(self, client_id: str, connection: ClientConnection):
+        try:
+            while True:
+                message = await connection.queue.get()
+                with timed("ws_send"):
+                    await asyncio.wait_for(connection.websocket.send_text(message), timeout=SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Dropping client '{client_id}' after send failure: {e!r}")
+            traceback.print_exc()
+            try:
+                await connection.websocket.close()
+            except Exception:
+                pass
+            self.disconnect(client_id, connection.websocket)
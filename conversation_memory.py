@@ -0,0 +1,161 @@
+# conversation_memory.py
+import os
+import json
+import asyncio
+import traceback
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+TOKEN_BUDGET = int(os.environ.get("CONVERSATION_TOKEN_BUDGET", "1500"))
+SUMMARY_CHAR_LIMIT = int(os.environ.get("CONVERSATION_SUMMARY_CHARS", "1200"))
+MAX_CONVERSATIONS = int(os.environ.get("CONVERSATION_MAX_CLIENTS", "1000"))
+MAX_TOOL_RECORDS = 5
+TOOL_RESULT_CHARS = 300
+TOOL_ARG_CHARS = 200
+
+# (previous_summary, transcript_of_older_turns) -> new rolling summary
+SummarizeFn = Callable[[str, str], Awaitable[str]]
+
+
+def _count_tokens(text: str) -> int:
+    # Same ~4 characters per token heuristic the LLM scheduler uses.
+    return len(text) // 4 + 1
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _clip_value(value, limit: int):
+    """Leaves short values as they are; long ones become a clipped string."""
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return value if len(text) <= limit else _clip(text, limit)
+
+
+class Conversation:
+    def __init__(self):
+        self.summary = ""
+        self.turns: deque[tuple[str, str]] = deque()  # ("user" | "assistant", text)
+        self.tool_records: deque[dict] = deque(maxlen=MAX_TOOL_RECORDS)
+        self.compaction: asyncio.Task | None = None
+
+    def turn_tokens(self) -> int:
+        return sum(_count_tokens(text) for _, text in self.turns)
+
+
+class ConversationStore:
+    """
+    Per-client chat history with a fixed token budget. Recent turns are kept verbatim;
+    once they outgrow the budget the oldest ones are folded into a rolling summary in the
+    background, so prompt size stays roughly constant however long a session runs.
+    Conversations live in this worker's memory and the least recently used are evicted.
+    """
+
+    def __init__(self, summarize: SummarizeFn, token_budget: int = TOKEN_BUDGET, max_conversations: int = MAX_CONVERSATIONS):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.max_conversations = max_conversations
+        self._conversations: OrderedDict[str, Conversation] = OrderedDict()
+
+    def get(self, client_id: str) -> Conversation:
+        conversation = self._conversations.get(client_id)
+        if conversation is None:
+            conversation = self._conversations[client_id] = Conversation()
+            while len(self._conversations) > self.max_conversations:
+                _, evicted = self._conversations.popitem(last=False)
+                if evicted.compaction:
+                    evicted.compaction.cancel()
+        self._conversations.move_to_end(client_id)
+        return conversation
+
+    def has_context(self, client_id: str) -> bool:
+        conversation = self._conversations.get(client_id)
+        return bool(conversation and (conversation.summary or conversation.turns or conversation.tool_records))
+
+    def build_messages(self, client_id: str, user_message: str, system_prompt: str = "") -> list[BaseMessage]:
+        """Returns system context + as many recent turns as fit the budget + the new user message."""
+        conversation = self.get(client_id)
+
+        context = [system_prompt] if system_prompt else []
+        if conversation.summary:
+            context.append(f"Summary of the earlier conversation:\n{conversation.summary}")
+        # The system context counts against the budget too; drop the oldest tool records if it
+        # alone would use more than half of it.
+        records = list(conversation.tool_records)
+        while records:
+            records_text = "\n".join(f"- {json.dumps(record, default=str)}" for record in records)
+            if _count_tokens("\n\n".join(context + [records_text])) <= self.token_budget // 2:
+                context.append(f"Results of earlier tool calls (most recent last):\n{records_text}")
+                break
+            records.pop(0)
+
+        # Newest turns first until the budget runs out. Normally compaction keeps everything
+        # within budget; this also bounds the prompt while a compaction is still running.
+        history: list[BaseMessage] = []
+        remaining = self.token_budget - (_count_tokens("\n\n".join(context)) if context else 0)
+        for role, text in reversed(conversation.turns):
+            remaining -= _count_tokens(text)
+            if remaining < 0:
+                break
+            history.append(HumanMessage(content=text) if role == "user" else AIMessage(content=text))
+        history.reverse()
+        if history and isinstance(history[0], AIMessage):
+            history.pop(0)  # its question didn't fit; don't start on an orphaned reply
+
+        messages: list[BaseMessage] = [SystemMessage(content="\n\n".join(context))] if context else []
+        return messages + history + [HumanMessage(content=user_message)]
+
+    def record_turn(self, client_id: str, user_message: str, reply: str, tool_record: dict | None = None):
+        conversation = self.get(client_id)
+        # A single huge paste must not crowd out everything else (or the compaction prompt).
+        turn_limit = self.token_budget * 2  # characters, i.e. about half the budget in tokens
+        conversation.turns.append(("user", _clip(user_message, turn_limit)))
+        conversation.turns.append(("assistant", _clip(reply, turn_limit)))
+        if tool_record:
+            self.record_tool_output(client_id, **tool_record)
+
+        if conversation.turn_tokens() > self.token_budget and conversation.compaction is None:
+            conversation.compaction = asyncio.create_task(self._compact(conversation))
+
+    def record_tool_output(self, client_id: str, tool: str, args: dict, result):
+        """Keeps a compact, structured note of a tool call so follow-ups can refer back to it."""
+        result_text = _clip(result if isinstance(result, str) else json.dumps(result, default=str), TOOL_RESULT_CHARS)
+        # Args can be as big as the result (e.g. a pasted transcript), so each one is clipped too.
+        clipped_args = {name: _clip_value(value, TOOL_ARG_CHARS) for name, value in args.items()}
+        self.get(client_id).tool_records.append({"tool": tool, "args": clipped_args, "result": result_text})
+
+    async def _compact(self, conversation: Conversation):
+        try:
+            # Fold the oldest turns until what is left fits in half the budget.
+            fold, tokens = 0, conversation.turn_tokens()
+            for _, text in conversation.turns:
+                if tokens <= self.token_budget // 2:
+                    break
+                tokens -= _count_tokens(text)
+                fold += 1
+            fold += fold % 2  # turns come in user/assistant pairs; never split one
+            older = list(conversation.turns)[:fold]
+            if not older:
+                return
+
+            transcript = "\n".join(f"{role}: {text}" for role, text in older)
+            # Keep the summarizer's prompt bounded too (the most recent part matters most).
+            transcript = transcript[-self.token_budget * 4:]
+            summary = (await self.summarize(conversation.summary, transcript)).strip()
+            conversation.summary = summary[:SUMMARY_CHAR_LIMIT]
+            # New turns are only ever appended, so the folded ones are still at the front.
+            for _ in range(fold):
+                conversation.turns.popleft()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            print("Conversation compaction failed; keeping raw turns:")
+            traceback.print_exc()
+            # If summaries keep failing (e.g. retries exhausted under sustained 429s), drop the
+            # oldest pairs instead of letting the history, and the next compaction, grow unbounded.
+            while conversation.turn_tokens() > self.token_budget * 2 and len(conversation.turns) > 2:
+                conversation.turns.popleft()
+                conversation.turns.popleft()
+        finally:
+            conversation.compaction = None
@@ -0,0 +1,27 @@
+# deployment.py
+import os
+import sys
+import argparse
+
+
+def worker_count() -> int:
+    """
+    How many server processes this deployment runs. Anything per-process that has to be shared
+    or split between them (the connection broker, the LLM rate limits) sizes itself from this.
+
+    `python server.py` hands WEB_CONCURRENCY to uvicorn, and both uvicorn and gunicorn use it as
+    their default worker count. A `--workers N` (gunicorn: `-w N`) on the command line is not
+    visible to the app otherwise, so it is read from sys.argv, which spawned and forked workers
+    inherit from the supervisor. When both are given they must agree.
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--workers", "-w")
+    flag = parser.parse_known_args(sys.argv[1:])[0].workers
+    env = os.environ.get("WEB_CONCURRENCY")
+    if flag is not None and env is not None and flag != env:
+        raise ValueError(f"--workers {flag} disagrees with WEB_CONCURRENCY={env}; set them to the same value.")
+    raw = flag if flag is not None else env
+    try:
+        return max(1, int(raw)) if raw is not None else 1
+    except ValueError:
+        raise ValueError(f"Can't tell how many workers are running from {raw!r}; pass an integer.") from None
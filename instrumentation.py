@@ -0,0 +1,167 @@
+# instrumentation.py
+import os
+import time
+import bisect
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+# --- Minimal Prometheus-style metrics ---
+# Kept dependency-free; metrics are per process, so scrape every worker.
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # key -> [bucket_counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.register(Histogram(
+    "ai_tools_stage_seconds", "Time spent in each pipeline stage.", ("stage",)))
+STAGE_ERRORS = metrics.register(Counter(
+    "ai_tools_stage_errors_total", "Pipeline stages that raised an exception.", ("stage",)))
+RESPONSES = metrics.register(Counter(
+    "ai_tools_responses_total", "Responses sent to clients, by widget content type.", ("content_type",)))
+
+
+# --- Optional OpenTelemetry spans (OTEL_TRACING=1 and opentelemetry-api installed) ---
+_tracer = None
+if os.environ.get("OTEL_TRACING", "0").strip().lower() in ("1", "true", "yes", "on"):
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("ai-tools-servers")
+    except ImportError:
+        print("⚠️ OTEL_TRACING is set but opentelemetry is not installed; spans are disabled.")
+
+
+# --- Per-request breakdown ---
+# Holds {stage: seconds} for the chat turn / upload currently being handled. asyncio.to_thread
+# copies the context, so stages timed inside tool threads land in the same record.
+_current_trace: ContextVar[dict | None] = ContextVar("_current_trace", default=None)
+
+
+@contextmanager
+def request_trace(name: str):
+    """Collects the stage timings of one request and prints a one-line breakdown when it ends."""
+    stages: dict[str, float] = {}
+    token = _current_trace.set(stages)
+    start = time.perf_counter()
+    try:
+        with timed(name):
+            yield stages
+    finally:
+        _current_trace.reset(token)
+        breakdown = " ".join(f"{stage}={seconds:.3f}s" for stage, seconds in stages.items() if stage != name)
+        print(f"⏱️ {name} took {time.perf_counter() - start:.3f}s [{breakdown}]")
+
+
+@contextmanager
+def timed(stage: str):
+    """Times a block into the stage histogram, the current request trace and an optional OTel span."""
+    with _tracer.start_as_current_span(stage) if _tracer else nullcontext():
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            STAGE_ERRORS.inc(stage=stage)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            STAGE_SECONDS.observe(elapsed, stage=stage)
+            stages = _current_trace.get()
+            if stages is not None:
+                stages[stage] = stages.get(stage, 0.0) + elapsed
+
+
+def traced(stage: str):
+    """Decorator form of `timed` for hot functions in the tool modules (sync or async)."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
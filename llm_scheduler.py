@@ -0,0 +1,293 @@
+# llm_scheduler.py
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+import openai
+from instrumentation import metrics, timed, Counter
+from deployment import worker_count
+
+# --- Priorities (lower runs first) ---
+INTERACTIVE = 0  # router + general chat replies the user is waiting on
+TOOL = 1         # LLM calls made inside a tool during a chat turn
+BACKGROUND = 2   # uploads, bulk jobs
+
+LLM_REQUESTS = metrics.register(Counter(
+    "ai_tools_llm_requests_total", "LLM requests completed by the scheduler.", ("priority", "outcome")))
+LLM_RETRIES = metrics.register(Counter(
+    "ai_tools_llm_retries_total", "LLM requests retried after a retryable error.", ("reason",)))
+LLM_COALESCED = metrics.register(Counter(
+    "ai_tools_llm_coalesced_total", "Calls merged into an identical in-flight LLM request."))
+
+COMPLETION_TOKEN_ESTIMATE = int(os.environ.get("LLM_COMPLETION_TOKEN_ESTIMATE", "256"))
+
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", TOOL: "tool", BACKGROUND: "background"}
+
+# Priority used by `scheduler.invoke` when the caller doesn't pass one. asyncio.to_thread copies
+# the context, so wrapping a request in `llm_priority(BACKGROUND)` also covers the tool threads.
+_current_priority: ContextVar[int] = ContextVar("_current_priority", default=TOOL)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """Classic token bucket; `consume` may drive the level negative to repay an underestimate."""
+
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.per_second
+
+    def consume(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+
+def _estimate_tokens(prompt) -> int:
+    text = prompt if isinstance(prompt, str) else repr(prompt)
+    # ~4 characters per token plus an allowance for the completion.
+    return len(text) // 4 + COMPLETION_TOKEN_ESTIMATE
+
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_reason(error: Exception) -> str | None:
+    """Returns a label for retryable errors (429, 5xx, connection/timeouts) and None otherwise."""
+    if isinstance(error, openai.APIConnectionError):
+        return "connection"
+    status = _status_code(error)
+    if status == 429:
+        return "rate_limited"
+    if status is not None and status >= 500:
+        return "server_error"
+    return None
+
+
+def _retry_after(error: Exception) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Request:
+    """One in-flight LLM call. Callers merged into it can raise its priority while it waits."""
+    __slots__ = ("priority", "waiter")
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.waiter: list | None = None  # its [priority, seq, tokens, future] heap entry while queued
+
+    def priority_name(self) -> str:
+        return _PRIORITY_NAMES.get(self.priority, str(self.priority))
+
+
+class LLMScheduler:
+    """
+    Single gateway for LLM traffic. Runs on its own event loop thread so both sync tool code
+    and the async server share one token bucket, one priority queue and one in-flight table.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int,
+                 max_retries: int, base_delay: float, max_delay: float):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_concurrency = max_concurrency
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self._paused_until = 0.0
+        self._waiters: list = []
+        self._seq = itertools.count()
+        self._inflight: dict = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._concurrency: asyncio.Semaphore | None = None
+        self._start_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LLMScheduler":
+        """
+        LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE are the provider's account-wide limits.
+        Each worker process has its own buckets, so the limits are split evenly across the
+        workers (see deployment.worker_count, which also sees `uvicorn --workers N`) to keep
+        the total under the provider's cap.
+        """
+        workers = worker_count()
+        return cls(
+            requests_per_minute=float(os.environ.get("LLM_REQUESTS_PER_MINUTE", "30")) / workers,
+            tokens_per_minute=float(os.environ.get("LLM_TOKENS_PER_MINUTE", "30000")) / workers,
+            max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "8")),
+            max_retries=int(os.environ.get("LLM_MAX_RETRIES", "4")),
+            base_delay=float(os.environ.get("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.environ.get("LLM_RETRY_MAX_DELAY", "20")),
+        )
+
+    # --- Public API ---
+    def invoke(self, llm, prompt, priority: int | None = None):
+        """Blocking call for tool modules (they run in worker threads)."""
+        priority = _current_priority.get() if priority is None else priority
+        future = asyncio.run_coroutine_threadsafe(self._submit(llm, prompt, priority, copy_context()), self._ensure_loop())
+        return future.result()
+
+    async def ainvoke(self, llm, prompt, priority: int = INTERACTIVE):
+        future = asyncio.run_coroutine_threadsafe(self._submit(llm, prompt, priority, copy_context()), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    # --- Scheduler loop ---
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    self._wakeup = asyncio.Event()
+                    self._concurrency = asyncio.Semaphore(self.max_concurrency)
+                    loop.create_task(self._dispatch())
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=_run, name="llm-scheduler", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
+
+    async def _submit(self, llm, prompt, priority: int, context: Context):
+        # Identical prompts to the same model share one request.
+        key = (id(llm), prompt if isinstance(prompt, str) else repr(prompt))
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            request = _Request(priority)
+            # Run the request in the caller's context so queue waits and backoff land in its
+            # request_trace breakdown (and OTel span); merged callers share the first one's.
+            pending = context.run(asyncio.get_running_loop().create_task, self._run(llm, prompt, request))
+            self._inflight[key] = (pending, request)
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            pending, request = inflight
+            LLM_COALESCED.inc()
+            if priority < request.priority:
+                # An interactive caller must not wait at the priority of a background one.
+                self._promote(request, priority)
+        # shield: one caller going away must not cancel the request for the others.
+        return await asyncio.shield(pending)
+
+    def _promote(self, request: _Request, priority: int):
+        request.priority = priority
+        waiter = request.waiter
+        if waiter is not None and waiter[3] is not None and not waiter[3].done():
+            # heapq can't re-key in place: retire the old entry (future -> None) and queue the
+            # same future again at the new priority, keeping its original age.
+            future, waiter[3] = waiter[3], None
+            request.waiter = [priority, waiter[1], waiter[2], future]
+            heapq.heappush(self._waiters, request.waiter)
+            self._wakeup.set()
+
+    async def _run(self, llm, prompt, request: _Request):
+        estimate = _estimate_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            with timed(f"llm.queue_wait:{request.priority_name()}"):
+                await self._acquire(request, estimate)
+            try:
+                async with self._concurrency:
+                    response = await llm.ainvoke(prompt)
+            except Exception as e:
+                reason = _retry_reason(e)
+                if reason is None or attempt == self.max_retries:
+                    LLM_REQUESTS.inc(priority=request.priority_name(), outcome="error")
+                    raise
+                LLM_RETRIES.inc(reason=reason)
+                # Full jitter, but never earlier than the provider's Retry-After.
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if reason == "rate_limited":
+                    # Hold the whole queue, not just this request, until the limit resets.
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                print(f"LLM request failed ({reason}, attempt {attempt + 1}/{self.max_retries + 1}); retrying in {delay:.2f}s")
+                with timed("llm.retry_backoff"):
+                    await asyncio.sleep(delay)
+                continue
+
+            usage = getattr(response, "usage_metadata", None) or {}
+            if usage.get("total_tokens"):
+                self._tokens.consume(usage["total_tokens"] - estimate)
+            LLM_REQUESTS.inc(priority=request.priority_name(), outcome="ok")
+            return response
+
+    async def _acquire(self, request: _Request, tokens: int):
+        future = asyncio.get_running_loop().create_future()
+        request.waiter = [request.priority, next(self._seq), tokens, future]
+        heapq.heappush(self._waiters, request.waiter)
+        self._wakeup.set()
+        try:
+            await future
+        finally:
+            request.waiter = None
+
+    async def _dispatch(self):
+        """Grants rate-limit capacity to the highest-priority (then oldest) waiter."""
+        while True:
+            while self._waiters and (self._waiters[0][3] is None or self._waiters[0][3].done()):
+                heapq.heappop(self._waiters)  # caller was cancelled, or the entry was re-queued by _promote
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            _, _, tokens, future = self._waiters[0]
+            wait = max(
+                self._paused_until - time.monotonic(),
+                self._requests.time_until(1),
+                self._tokens.time_until(tokens),
+            )
+            if wait > 0:
+                # A new, higher-priority waiter wakes us early so it can take the head slot.
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._waiters)
+            self._requests.consume(1)
+            self._tokens.consume(tokens)
+            future.set_result(None)
+
+
+scheduler = LLMScheduler.from_env()
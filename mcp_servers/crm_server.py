@@ -2,9 +2,10 @@ from pydantic import BaseModel, Field
 import datetime, re, os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from llm_scheduler import scheduler
 
 load_dotenv()
-llm = ChatOpenAI(base_url="https://api.groq.com/openai/v1", api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192")
+llm = ChatOpenAI(base_url=os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1"), api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192", max_retries=0)
 
 CRM_DATA = {
     "jane.doe@example.com": {
@@ -46,7 +47,7 @@ def draft_follow_up_email(customer_email: str) -> EmailDraft:
     last_topic = customer_info["interactions"][-1]["topic"] if customer_info["interactions"] else "our recent conversation"
 
     prompt = f"You are a sales assistant... [Full prompt here]"
-    response = llm.invoke(prompt)
+    response = scheduler.invoke(llm, prompt)
     email_content = response.content
 
     subject_match = re.search(r"Subject: (.*)", email_content)
@@ -3,10 +3,11 @@ import os
 import re
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from llm_scheduler import scheduler
 from pydantic import BaseModel, Field
 
 load_dotenv()
-llm = ChatOpenAI(base_url="https://api.groq.com/openai/v1", api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192", temperature=0.0)
+llm = ChatOpenAI(base_url=os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1"), api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192", max_retries=0, temperature=0.0)
 
 class FlowchartResult(BaseModel):
     title: str
@@ -48,7 +49,7 @@ def create_flowchart(concept_description: str) -> FlowchartResult:
     **Your Output:**
     """
 
-    response = llm.invoke(prompt)
+    response = scheduler.invoke(llm, prompt)
     mermaid_code = response.content.strip()
 
     # Fallback cleanup
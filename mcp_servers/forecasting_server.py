@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 import numpy as np
 # Import the ARIMA model
 from statsmodels.tsa.arima.model import ARIMA
+from instrumentation import timed
 
 load_dotenv()
 app = FastMCP("ForecastingServer")
@@ -28,11 +29,13 @@ def forecast_data(historical_data: List[float], data_name: str, forecast_periods
         return ForecastResult(data_name=f"Error for '{data_name}'", labels=["Error"], historical_data=[], forecast_data=[])
     
     try:
-        model = ARIMA(historical_data, order=(2, 1, 1))
-        model_fit = model.fit()
+        with timed("forecast.arima_fit"):
+            model = ARIMA(historical_data, order=(2, 1, 1))
+            model_fit = model.fit()
         
        
-        forecast = model_fit.forecast(steps=forecast_periods)
+        with timed("forecast.arima_predict"):
+            forecast = model_fit.forecast(steps=forecast_periods)
         
      
         forecasted_points = np.maximum(forecast, 0).tolist() # Ensure no negative predictions
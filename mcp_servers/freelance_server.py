@@ -2,9 +2,10 @@ from pydantic import BaseModel, Field
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from llm_scheduler import scheduler
 
 load_dotenv()
-llm = ChatOpenAI(base_url="https://api.groq.com/openai/v1", api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192")
+llm = ChatOpenAI(base_url=os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1"), api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192", max_retries=0)
 
 class ProjectProposal(BaseModel):
     proposal_text: str
@@ -12,5 +13,5 @@ class ProjectProposal(BaseModel):
 def generate_project_proposal(client_name: str, project_description: str) -> ProjectProposal:
     """Generates a professional project proposal..."""
     prompt = f"You are a professional business consultant...\n**Client Name:** {client_name}\n**Project Description:** {project_description}\n..."
-    response = llm.invoke(prompt)
+    response = scheduler.invoke(llm, prompt)
     return ProjectProposal(proposal_text=response.content)
\ No newline at end of file
@@ -2,9 +2,10 @@ from pydantic import BaseModel, Field
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from llm_scheduler import scheduler
 
 load_dotenv()
-llm = ChatOpenAI(base_url="https://api.groq.com/openai/v1", api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192")
+llm = ChatOpenAI(base_url=os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1"), api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192", max_retries=0)
 
 class OnboardingChecklist(BaseModel):
     checklist: str
@@ -12,6 +13,6 @@ class OnboardingChecklist(BaseModel):
 def generate_onboarding_checklist(client_name: str, service_type: str) -> OnboardingChecklist:
     """Creates a detailed onboarding checklist..."""
     prompt = f"You are a project manager... Create a detailed onboarding checklist for **Client:** {client_name} for our **Service:** {service_type}..."
-    response = llm.invoke(prompt)
+    response = scheduler.invoke(llm, prompt)
     checklist = f"**Onboarding Checklist for {client_name} ({service_type} Service)**\n\n{response.content}"
     return OnboardingChecklist(checklist=checklist)
\ No newline at end of file
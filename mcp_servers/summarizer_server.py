@@ -4,9 +4,11 @@ from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import re, os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from llm_scheduler import scheduler
+from instrumentation import timed
 
 load_dotenv()
-llm = ChatOpenAI(base_url="https://api.groq.com/openai/v1", api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192")
+llm = ChatOpenAI(base_url=os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1"), api_key=os.environ.get("GROQ_API_KEY"), model="llama3-8b-8192", max_retries=0)
 analyzer = SentimentIntensityAnalyzer()
 
 # Renamed to be more generic
@@ -20,10 +22,12 @@ class ContentSummary(BaseModel):
 def analyze_and_summarize_transcript(transcript_text: str) -> ContentSummary:
     """Summarizes a meeting or video transcript..."""
     summary_prompt = f"Summarize the key points of the following transcript...\n\n---\n{transcript_text}\n---"
-    summary = llm.invoke(summary_prompt).content
+    with timed("summarize.llm"):
+        summary = scheduler.invoke(llm, summary_prompt).content
     action_items = "\n".join(re.findall(r'.*?(?:(?:will|can|please|need to)\s(?:you|I|we|he|she|they|[A-Z][a-z]+)\s.*?\w+).*', transcript_text, re.IGNORECASE))
     action_items_str = f"**Action Items:**\n{action_items}" if action_items else "**Action Items:**\nNo specific action items were identified."
-    sentiment = analyzer.polarity_scores(transcript_text)
+    with timed("summarize.sentiment"):
+        sentiment = analyzer.polarity_scores(transcript_text)
     score = sentiment['compound']
     label = "Positive" if score >= 0.05 else "Negative" if score <= -0.05 else "Neutral"
     return ContentSummary(summary_text=f"**Key Points:**\n{summary}", action_items=action_items_str, overall_sentiment=label, sentiment_score=score)
\ No newline at end of file
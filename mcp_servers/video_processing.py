@@ -2,20 +2,34 @@
 import speech_recognition as sr
 from moviepy.editor import VideoFileClip
 import os
+import threading
 from vosk import Model
+from instrumentation import timed
 
 # --- VOSK Model Setup ---
 # IMPORTANT: Update this path to where you unzipped the Vosk model.
 VOSK_MODEL_PATH = "vosk-model-small-en-us-0.15" 
-if not os.path.exists(VOSK_MODEL_PATH):
-    raise FileNotFoundError(
-        f"Vosk model not found at '{VOSK_MODEL_PATH}'. "
-        "Please download a model from https://alphacephei.com/vosk/models, "
-        "unzip it, and set the correct path in mcp_servers/video_processing.py"
-    )
 
-recognizer = sr.Recognizer()
-model = Model(VOSK_MODEL_PATH)
+# The model is loaded on first transcription rather than at import, so a missing
+# model only breaks video uploads instead of the whole server.
+recognizer: sr.Recognizer | None = None
+_recognizer_lock = threading.Lock()
+
+def _get_recognizer() -> sr.Recognizer:
+    global recognizer
+    with _recognizer_lock:
+        if recognizer is None:
+            if not os.path.exists(VOSK_MODEL_PATH):
+                raise FileNotFoundError(
+                    f"Vosk model not found at '{VOSK_MODEL_PATH}'. "
+                    "Please download a model from https://alphacephei.com/vosk/models, "
+                    "unzip it, and set the correct path in mcp_servers/video_processing.py"
+                )
+            rec = sr.Recognizer()
+            # recognize_vosk() reuses an existing `vosk_model` attribute instead of loading ./model
+            rec.vosk_model = Model(VOSK_MODEL_PATH)
+            recognizer = rec
+    return recognizer
 
 def extract_text_from_video(video_path: str) -> str:
     """
@@ -24,25 +38,29 @@ def extract_text_from_video(video_path: str) -> str:
     """
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Video file not found at path: {video_path}")
+    recognizer = _get_recognizer()
 
     print(f"Processing video file: {video_path}")
-    video_clip = VideoFileClip(video_path)
-    
-    # Create a unique audio file path in the same directory
-    audio_path = os.path.join(os.path.dirname(video_path), f"{os.path.basename(video_path)}.wav")
-    
-    # Extract audio with specific parameters for Vosk
-    video_clip.audio.write_audiofile(audio_path, codec='pcm_s16le', fps=16000)
-    video_clip.close()
+    with timed("transcribe.extract_audio"):
+        video_clip = VideoFileClip(video_path)
+        
+        # Create a unique audio file path in the same directory
+        audio_path = os.path.join(os.path.dirname(video_path), f"{os.path.basename(video_path)}.wav")
+        
+        # Extract audio with specific parameters for Vosk
+        video_clip.audio.write_audiofile(audio_path, codec='pcm_s16le', fps=16000)
+        video_clip.close()
     print(f"Temporary audio extracted to: {audio_path}")
 
     text = ""
     with sr.AudioFile(audio_path) as source:
         print("Transcribing audio...")
-        audio_data = recognizer.record(source)
+        with timed("transcribe.load_audio"):
+            audio_data = recognizer.record(source)
         try:
             # Use recognize_vosk for local transcription. It returns a JSON string.
-            vosk_result_str = recognizer.recognize_vosk(audio_data)
+            with timed("transcribe.recognize"):
+                vosk_result_str = recognizer.recognize_vosk(audio_data)
             # The result is a dictionary string, e.g., {'text': '...'}. We need to parse it.
             import json
             text = json.loads(vosk_result_str).get("text", "")
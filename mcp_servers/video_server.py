@@ -6,6 +6,7 @@ from moviepy.editor import ImageSequenceClip, concatenate_videoclips, AudioFileC
 from gtts import gTTS
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
+from instrumentation import timed, traced
 
 STATIC_DIR = "static"
 AUDIO_TEMP_PATH = os.path.join(STATIC_DIR, "audio")
@@ -20,6 +21,7 @@ class VideoResult(BaseModel):
     intro_text: str
     video_url: str
 
+@traced("render.slide_image")
 def _create_slide_image(text, slide_type="normal", width=1280, height=720):
     """Internal helper to create a single slide image."""
     # Define colors
@@ -72,10 +74,11 @@ def create_video_from_script(product_name: str, script: str) -> VideoResult:
     audio_path = None
     try:
         # 1. Generate Voiceover
-        tts = gTTS(text=script, lang='en', slow=False)
-        temp_audio_filename = f"temp_audio_{uuid.uuid4()}.mp3"
-        audio_path = os.path.join(AUDIO_TEMP_PATH, temp_audio_filename)
-        tts.save(audio_path)
+        with timed("render.tts"):
+            tts = gTTS(text=script, lang='en', slow=False)
+            temp_audio_filename = f"temp_audio_{uuid.uuid4()}.mp3"
+            audio_path = os.path.join(AUDIO_TEMP_PATH, temp_audio_filename)
+            tts.save(audio_path)
         audio_clip = AudioFileClip(audio_path)
         
         # 2. Generate Slides
@@ -111,7 +114,8 @@ def create_video_from_script(product_name: str, script: str) -> VideoResult:
         # 4. Write Final Video
         video_filename = f"video_{uuid.uuid4()}.mp4"
         video_filepath = os.path.join(VIDEO_OUTPUT_PATH, video_filename)
-        final_video.write_videofile(video_filepath, codec='libx264', audio_codec='aac', threads=4, preset='medium')
+        with timed("render.encode"):
+            final_video.write_videofile(video_filepath, codec='libx264', audio_codec='aac', threads=4, preset='medium')
 
         # 5. Return the result with a relative URL
         video_url = f"/{STATIC_DIR}/videos/{video_filename}"
@@ -1,66 +1,81 @@
 # server.py
+import time
+# Taken before any other import so /health's startup_seconds includes fastapi, langchain, etc.
+_PROCESS_START = time.perf_counter()
+
 import os
 import json
+import shutil
 import uvicorn
 import traceback
 import asyncio
 from contextlib import asynccontextmanager
 from typing import List, Union
 from fastapi.staticfiles import StaticFiles
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, File, UploadFile
+from fastapi.responses import PlainTextResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, File, UploadFile, HTTPException
 from langchain_openai import ChatOpenAI
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.tools import tool
 from dotenv import load_dotenv
 
-# --- All your tool imports remain the same ---
-from mcp_servers.freelance_server import generate_project_proposal, ProjectProposal
-from mcp_servers.video_server import create_video_from_script, VideoResult
-from mcp_servers.support_server import get_support_answer, SupportResponse
-from mcp_servers.virtual_employee_server import schedule_meeting, MeetingConfirmation
-from mcp_servers.summarizer_server import analyze_and_summarize_transcript, ContentSummary
-# --- NEW: Import the video processor ---
-from mcp_servers.video_processing import extract_text_from_video
-from mcp_servers.crm_server import draft_follow_up_email, EmailDraft, add_customer_interaction, CrmConfirmation
-from mcp_servers.forecasting_server import forecast_data, ForecastResult
-from mcp_servers.inbox_server import categorize_email, EmailCategory
-from mcp_servers.onboarding_server import generate_onboarding_checklist, OnboardingChecklist
-from mcp_servers.flowchart_server import create_flowchart, FlowchartResult
+# --- Tool modules are imported lazily through the registry (see tool_registry.py) ---
+from tool_registry import registry, TOOL_MODULES, enabled_tool_names, warmup_enabled
+from connection_manager import ConnectionManager, InProcessBroker, create_broker
+from instrumentation import metrics, request_trace, timed, RESPONSES
+from llm_scheduler import scheduler, llm_priority, INTERACTIVE, TOOL, BACKGROUND
+from conversation_memory import ConversationStore
+from deployment import worker_count
+from answer_cache import AnswerCache, is_self_contained
 
 load_dotenv()
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 
-# --- ConnectionManager remains the same ---
-class ConnectionManager:
-    def __init__(self): self.active_connections: dict[str, WebSocket] = {}
-    async def connect(self, websocket: WebSocket, client_id: str): await websocket.accept(); self.active_connections[client_id] = websocket
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections: del self.active_connections[client_id]
-    async def send_personal_message(self, message: str, client_id: str):
-        if client_id in self.active_connections: await self.active_connections[client_id].send_text(message)
-
-manager = ConnectionManager()
+# --- Messages route through a broker so any worker can reach any client (CONNECTION_BROKER_URL) ---
+manager = ConnectionManager(broker=create_broker())
 llm_with_tools: ChatOpenAI | None = None
 llm_general: ChatOpenAI | None = None
 
+async def summarize_history(previous_summary: str, transcript: str) -> str:
+    """Folds older chat turns into the client's rolling summary (runs in the background)."""
+    prompt = f"""
+    Update the running summary of a conversation between a user and an AI assistant.
+    Keep names, numbers, decisions and anything the user may refer back to. Use at most 150 words.
+    Output ONLY the updated summary.
+
+    Current summary:
+    {previous_summary or "(none)"}
+
+    New turns to fold in:
+    {transcript}
+    """
+    response = await scheduler.ainvoke(llm_general, prompt, priority=BACKGROUND)
+    return response.content
+
+# --- Per-client history so follow-ups ("now make it shorter") have context ---
+conversations = ConversationStore(summarize=summarize_history)
+
+# --- Repeated standalone questions reuse a recent general answer (None when disabled) ---
+answer_cache = AnswerCache.from_env()
+
 # --- All your @tool definitions remain the same ---
 @tool
-def financial_forecasting_tool(historical_data: List[Union[int, float]], data_name: str, forecast_periods: int = 4) -> ForecastResult:
+def financial_forecasting_tool(historical_data: List[Union[int, float]], data_name: str, forecast_periods: int = 4):
     """Generates a realistic forecast using an ARIMA model. Use this for predicting future data points based on historical trends, like sales, revenue, or user signups."""
-    return forecast_data(historical_data=historical_data, data_name=data_name, forecast_periods=forecast_periods)
+    return registry.load(TOOL_MODULES["financial_forecasting_tool"]).forecast_data(historical_data=historical_data, data_name=data_name, forecast_periods=forecast_periods)
 
 @tool
-def crm_follow_up_tool(customer_email: str) -> EmailDraft:
+def crm_follow_up_tool(customer_email: str):
     """Drafts a personalized follow-up email to a customer based on their interaction history in the CRM."""
-    return draft_follow_up_email(customer_email=customer_email)
+    return registry.load(TOOL_MODULES["crm_follow_up_tool"]).draft_follow_up_email(customer_email=customer_email)
 
 @tool
-def crm_logging_tool(customer_email: str, topic: str) -> CrmConfirmation:
+def crm_logging_tool(customer_email: str, topic: str):
     """Adds or logs a new interaction (like a call or meeting) with a customer in the CRM."""
-    return add_customer_interaction(customer_email=customer_email, topic=topic)
+    return registry.load(TOOL_MODULES["crm_logging_tool"]).add_customer_interaction(customer_email=customer_email, topic=topic)
 
 @tool
-def video_creator_tool(product_name: str, target_audience: str, key_benefit: str) -> VideoResult:
+def video_creator_tool(product_name: str, target_audience: str, key_benefit: str):
     """
     Creates a full marketing video with generated voiceover and slides.
     Use this for any request to "create a video".
@@ -80,7 +95,8 @@ def video_creator_tool(product_name: str, target_audience: str, key_benefit: str
     The final sentence must be a strong call to action.
     """
     
-    script_response = llm_general.invoke(script_prompt)
+    with timed("render.script_llm"):
+        script_response = scheduler.invoke(llm_general, script_prompt, priority=TOOL)
     raw_script = script_response.content.strip()
 
     # --- FIXED: Clean up the script to remove any conversational filler from the LLM ---
@@ -98,53 +114,53 @@ def video_creator_tool(product_name: str, target_audience: str, key_benefit: str
     print("Step 2: Calling local video creation function...")
 
     # Step B: Call the local Python function with the generated script
-    return create_video_from_script(product_name=product_name, script=script)
+    return registry.load(TOOL_MODULES["video_creator_tool"]).create_video_from_script(product_name=product_name, script=script)
 
 @tool
-def flowchart_agent_tool(concept_description: str) -> FlowchartResult:
+def flowchart_agent_tool(concept_description: str):
     """
     Use this tool to generate a flowchart diagram for any process, workflow, or concept. 
     It is the best choice for visualizing steps or creating diagrams. 
     For example, if the user asks 'create a flowchart of the scientific method', 'visualize how rain is formed', or 'map out the customer support process', this tool must be used.
     """
-    return create_flowchart(concept_description=concept_description)
+    return registry.load(TOOL_MODULES["flowchart_agent_tool"]).create_flowchart(concept_description=concept_description)
 
 
 @tool
-def freelance_proposal_tool(client_name: str, project_description: str) -> ProjectProposal:
+def freelance_proposal_tool(client_name: str, project_description: str):
     """Generates a professional project proposal for a client based on a project description."""
-    return generate_project_proposal(client_name=client_name, project_description=project_description)
+    return registry.load(TOOL_MODULES["freelance_proposal_tool"]).generate_project_proposal(client_name=client_name, project_description=project_description)
 
 @tool
-def content_summarizer_tool(transcript_text: str) -> ContentSummary:
+def content_summarizer_tool(transcript_text: str):
     """
     Analyzes and summarizes a provided block of text from a meeting or video transcript.
     It extracts key points, action items, and sentiment. Use this for any summarization request.
     If the user pastes a large block of text and asks "what is this?" or "summarize this", this is the tool to use.
     """
     print(f"Summarizing text of length: {len(transcript_text)}")
-    return analyze_and_summarize_transcript(transcript_text=transcript_text)
+    return registry.load(TOOL_MODULES["content_summarizer_tool"]).analyze_and_summarize_transcript(transcript_text=transcript_text)
 
 
 @tool
-def customer_support_tool(customer_query: str) -> SupportResponse:
+def customer_support_tool(customer_query: str):
     """Answers customer questions by searching a knowledge base. Use for queries about passwords, shipping, refunds, etc."""
-    return get_support_answer(customer_query=customer_query)
+    return registry.load(TOOL_MODULES["customer_support_tool"]).get_support_answer(customer_query=customer_query)
 
 @tool
-def virtual_employee_tool(topic: str, attendees: List[str], date_time: str) -> MeetingConfirmation:
+def virtual_employee_tool(topic: str, attendees: List[str], date_time: str):
     """Schedules a meeting with specified attendees at a given date and time."""
-    return schedule_meeting(topic=topic, attendees=attendees, date_time=date_time)
+    return registry.load(TOOL_MODULES["virtual_employee_tool"]).schedule_meeting(topic=topic, attendees=attendees, date_time=date_time)
 
 @tool
-def inbox_zero_tool(subject: str, sender: str) -> EmailCategory:
+def inbox_zero_tool(subject: str, sender: str):
     """Categorizes an email based on its subject and sender to determine its priority (Important, General, Promotions)."""
-    return categorize_email(subject=subject, sender=sender)
+    return registry.load(TOOL_MODULES["inbox_zero_tool"]).categorize_email(subject=subject, sender=sender)
 
 @tool
-def onboarding_bot_tool(client_name: str, service_type: str) -> OnboardingChecklist:
+def onboarding_bot_tool(client_name: str, service_type: str):
     """Creates a detailed onboarding checklist for a new client based on the service they signed up for."""
-    return generate_onboarding_checklist(client_name=client_name, service_type=service_type)
+    return registry.load(TOOL_MODULES["onboarding_bot_tool"]).generate_onboarding_checklist(client_name=client_name, service_type=service_type)
 
 ALL_TOOLS = [
     financial_forecasting_tool, crm_follow_up_tool, crm_logging_tool, video_creator_tool,
@@ -152,6 +168,10 @@ ALL_TOOLS = [
     customer_support_tool, virtual_employee_tool, inbox_zero_tool, onboarding_bot_tool,
 ]
 
+# --- ENABLED_TOOLS lets small replicas (e.g. chat-only) skip tools they don't serve ---
+_enabled_names = enabled_tool_names()
+ENABLED_TOOLS = [t for t in ALL_TOOLS if _enabled_names is None or t.name in _enabled_names]
+
 # --- This mapping is crucial for sending the correct widget type to the frontend ---
 TOOL_NAME_TO_CONTENT_TYPE = {
     "financial_forecasting_tool": "chart",
@@ -168,10 +188,46 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 @app.on_event("startup")
 async def startup_event():
     global llm_with_tools, llm_general
-    base_llm = ChatOpenAI(base_url="https://api.groq.com/openai/v1", api_key=GROQ_API_KEY, model="llama3-8b-8192", temperature=0.1)
-    llm_with_tools = base_llm.bind_tools(ALL_TOOLS)
+    # Without a shared broker, a message published in one worker never reaches sockets held by another.
+    # worker_count() also sees `uvicorn --workers N`, which never sets WEB_CONCURRENCY.
+    if worker_count() > 1 and isinstance(manager.broker, InProcessBroker):
+        raise RuntimeError(f"{worker_count()} workers require CONNECTION_BROKER_URL (e.g. redis://localhost:6379/0); "
+                           "the in-process broker cannot route messages between workers.")
+    await manager.start()
+    base_llm = ChatOpenAI(base_url=os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1"), api_key=GROQ_API_KEY, model="llama3-8b-8192", temperature=0.1, max_retries=0)
+    # With no tools enabled the router never returns tool calls and everything falls back to chat.
+    llm_with_tools = base_llm.bind_tools(ENABLED_TOOLS) if ENABLED_TOOLS else base_llm
     llm_general = base_llm
-    print("✅ LLMs initialized successfully.")
+    print(f"✅ LLMs initialized successfully ({len(ENABLED_TOOLS)}/{len(ALL_TOOLS)} tools enabled).")
+
+    registry.startup_seconds = time.perf_counter() - _PROCESS_START
+    print(f"🚀 Startup took {registry.startup_seconds:.2f}s.")
+
+    # Import the heavy tool modules in the background instead of before the first request.
+    if warmup_enabled():
+        warm_modules = [TOOL_MODULES[t.name] for t in ENABLED_TOOLS]
+        if content_summarizer_tool in ENABLED_TOOLS:
+            warm_modules.append("mcp_servers.video_processing")  # used by /upload_and_summarize
+        registry.warm_up(warm_modules)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await manager.stop()
+
+@app.get("/health")
+async def health():
+    """Reports startup time, enabled tools and per-module import times."""
+    return {
+        "status": "ok",
+        "enabled_tools": [t.name for t in ENABLED_TOOLS],
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        **registry.stats(),
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition of stage latencies and counters for this worker."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
     # --- NEW: Add a file upload endpoint ---
 @app.post("/upload_and_summarize/{client_id}")
@@ -180,43 +236,55 @@ async def upload_and_summarize(client_id: str, file: UploadFile = File(...)):
     Handles video file uploads. It saves the file, extracts text, summarizes it,
     and sends the result back to the specific client via WebSocket.
     """
-    response_payload = {}
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    # A replica without the summarizer (e.g. chat-only) must not pull in moviepy/vosk here either.
+    if content_summarizer_tool not in ENABLED_TOOLS:
+        raise HTTPException(status_code=404, detail="content_summarizer_tool is not enabled on this server.")
+    # Upload summaries are long and nobody is blocked typing, so they yield to chat traffic.
+    with request_trace("upload_and_summarize"), llm_priority(BACKGROUND):
+        response_payload = {}
+        file_path = os.path.join(UPLOAD_DIR, file.filename)
     
-    try:
-        # 1. Save the uploaded file to the temp directory
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # 2. Inform frontend that transcription is starting
-        await manager.send_personal_message(
-            json.dumps({"content_type": "text", "payload": {"content": f"File '{file.filename}' received. Starting transcription (this may take a few moments)..."}}),
-            client_id
-        )
-
-        # 3. Extract text from video (this is a blocking IO operation)
-        transcript_text = await asyncio.to_thread(extract_text_from_video, file_path)
-
-        if "Transcription failed" in transcript_text or not transcript_text.strip():
-             raise Exception(transcript_text or "The video appears to contain no speech.")
-
-        # 4. Summarize the extracted text using the existing tool logic
-        tool_output = content_summarizer_tool.func(transcript_text=transcript_text)
-        payload_data = tool_output.model_dump()
-
-        # 5. Package the response for the frontend widget
-        final_payload = {"intro_text": f"Here is the summary for '{file.filename}':", **payload_data}
-        response_payload = {"content_type": "summary", "payload": final_payload}
-
-    except Exception as e:
-        print(traceback.format_exc())
-        error_message = f"I encountered an error processing your file: {str(e)}"
-        response_payload = {"content_type": "text", "payload": {"content": f"**Error:** {error_message}"}}
-        # Clean up failed file if it exists
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-    await manager.send_personal_message(json.dumps(response_payload), client_id)
+        try:
+            # 1. Save the uploaded file to the temp directory
+            with open(file_path, "wb") as buffer:
+                shutil.copyfileobj(file.file, buffer)
+
+            # 2. Inform frontend that transcription is starting
+            await manager.send_personal_message(
+                json.dumps({"content_type": "text", "payload": {"content": f"File '{file.filename}' received. Starting transcription (this may take a few moments)..."}}),
+                client_id
+            )
+
+            # 3. Extract text from video (this is a blocking IO operation)
+            video_processing = await asyncio.to_thread(registry.load, "mcp_servers.video_processing")
+            with timed("transcribe"):
+                transcript_text = await asyncio.to_thread(video_processing.extract_text_from_video, file_path)
+
+            if "Transcription failed" in transcript_text or not transcript_text.strip():
+                 raise Exception(transcript_text or "The video appears to contain no speech.")
+
+            # 4. Summarize the extracted text using the existing tool logic
+            with timed("tool:content_summarizer_tool"):
+                tool_output = await asyncio.to_thread(content_summarizer_tool.func, transcript_text=transcript_text)
+            payload_data = tool_output.model_dump()
+            # Only the worker holding the socket serves this client's chat turns.
+            if client_id in manager.active_connections:
+                conversations.record_tool_output(client_id, tool="content_summarizer_tool", args={"file": file.filename}, result=payload_data)
+
+            # 5. Package the response for the frontend widget
+            final_payload = {"intro_text": f"Here is the summary for '{file.filename}':", **payload_data}
+            response_payload = {"content_type": "summary", "payload": final_payload}
+
+        except Exception as e:
+            print(traceback.format_exc())
+            error_message = f"I encountered an error processing your file: {str(e)}"
+            response_payload = {"content_type": "text", "payload": {"content": f"**Error:** {error_message}"}}
+            # Clean up failed file if it exists
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        await manager.send_personal_message(json.dumps(response_payload), client_id)
+        RESPONSES.inc(content_type=response_payload.get("content_type", "text"))
     return {"status": "processing_complete"}
 
 @app.websocket("/ws/{client_id}")
@@ -234,64 +302,109 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
             # All logic is now handled by the `text_message` AI router below.
 
             if message_type == "text_message":
-                user_message = message_data.get("content")
-                response_payload = {}
+                with request_trace("chat_turn"):
+                    user_message = message_data.get("content")
+                    response_payload = {}
                 
-                try:
-                    if not llm_with_tools or not llm_general:
-                        raise Exception("AI services are not available.")
-
-                    # Step 1: Let the AI router decide which tool to use, if any.
-                    ai_response = await llm_with_tools.ainvoke(user_message)
+                    try:
+                        if not llm_with_tools or not llm_general:
+                            raise Exception("AI services are not available.")
+
+                        # Step 0: A question we recently answered without a tool skips both LLM calls.
+                        # Decided per message: follow-ups that point back at earlier turns ("make it
+                        # shorter") are kept away from the cache.
+                        had_history = conversations.has_context(client_id)
+                        cacheable = answer_cache is not None and (not had_history or is_self_contained(user_message))
+                        cached_answer = None
+                        if cacheable:
+                            with timed("answer_cache"):
+                                cached_answer = answer_cache.lookup(user_message)
+
+                        # Step 1: Let the AI router decide which tool to use, if any.
+                        if cached_answer is None:
+                            with timed("router_llm"):
+                                ai_response = await scheduler.ainvoke(llm_with_tools, conversations.build_messages(client_id, user_message), priority=INTERACTIVE)
                     
-                    if ai_response.tool_calls:
-                        tool_call = ai_response.tool_calls[0]
-                        tool_name = tool_call['name']
-                        tool_args = tool_call['args']
+                        if cached_answer is not None:
+                            response_payload = {"content_type": "text", "payload": {"content": cached_answer}}
+                            conversations.record_turn(client_id, user_message, cached_answer)
+
+                        elif ai_response.tool_calls:
+                            tool_call = ai_response.tool_calls[0]
+                            tool_name = tool_call['name']
+                            tool_args = tool_call['args']
                         
-                        target_tool = next((t for t in ALL_TOOLS if t.name == tool_name), None)
-                        if not target_tool:
-                            raise Exception(f"LLM tried to call an unknown tool: {tool_name}")
+                            target_tool = next((t for t in ENABLED_TOOLS if t.name == tool_name), None)
+                            if not target_tool:
+                                raise Exception(f"LLM tried to call an unknown tool: {tool_name}")
                         
-                        # Step 2: Execute the chosen tool.
-                        tool_output = await asyncio.to_thread(target_tool.func, **tool_args)
+                            # Step 2: Execute the chosen tool.
+                            with timed(f"tool:{tool_name}"):
+                                tool_output = await asyncio.to_thread(target_tool.func, **tool_args)
                         
-                        payload_data = tool_output.model_dump() if hasattr(tool_output, 'model_dump') else {"content": str(tool_output)}
+                            with timed("serialize"):
+                                payload_data = tool_output.model_dump() if hasattr(tool_output, 'model_dump') else {"content": str(tool_output)}
                         
-                        # Step 3: Package the response for the frontend widget.
-                        content_type = TOOL_NAME_TO_CONTENT_TYPE.get(tool_name, "text") # Default to text
-
-                        final_payload = payload_data
-                        # For certain widgets, we can add introductory text.
-                        if content_type == "email": final_payload = {"intro_text": "I've drafted this email for you:", **payload_data}
-                        elif content_type == "video": final_payload = {"intro_text": "Video script generation initiated:", **payload_data}
-                        elif content_type == "video_summary": final_payload = {"intro_text": "Here is the summary of the video:", **payload_data}
-                        elif content_type == "mermaid": final_payload = {"intro_text": "Here is the generated flowchart:", **payload_data}
-                        elif content_type == "text": # For tools that return text, ensure it's in the right format.
-                           final_payload = {"content": next(iter(payload_data.values()), str(payload_data))}
-
-                        response_payload = {"content_type": content_type, "payload": final_payload}
+                            # Step 3: Package the response for the frontend widget.
+                            content_type = TOOL_NAME_TO_CONTENT_TYPE.get(tool_name, "text") # Default to text
+
+                            final_payload = payload_data
+                            # For certain widgets, we can add introductory text.
+                            if content_type == "email": final_payload = {"intro_text": "I've drafted this email for you:", **payload_data}
+                            elif content_type == "video": final_payload = {"intro_text": "Video script generation initiated:", **payload_data}
+                            elif content_type == "video_summary": final_payload = {"intro_text": "Here is the summary of the video:", **payload_data}
+                            elif content_type == "mermaid": final_payload = {"intro_text": "Here is the generated flowchart:", **payload_data}
+                            elif content_type == "text": # For tools that return text, ensure it's in the right format.
+                               final_payload = {"content": next(iter(payload_data.values()), str(payload_data))}
+
+                            response_payload = {"content_type": content_type, "payload": final_payload}
+                            conversations.record_turn(
+                                client_id, user_message, f"[Used {tool_name}]",
+                                tool_record={"tool": tool_name, "args": tool_args, "result": payload_data},
+                            )
                     
-                    else:
-                        # Step 4: If no tool was chosen, fall back to a general text response.
-                        final_response = await llm_general.ainvoke(f"As a helpful AI assistant, provide a concise response to the following user query: {user_message}")
-                        response_payload = {"content_type": "text", "payload": {"content": final_response.content}}
-
-                except Exception as e:
-                    print(traceback.format_exc())
-                    error_message = f"I encountered an error processing your request: {str(e)}"
-                    response_payload = {"content_type": "text", "payload": {"content": f"**Error:** {error_message}"}}
-
-                # --- FIX: Simplified the final send message call ---
-                await manager.send_personal_message(json.dumps(response_payload), client_id)
+                        else:
+                            # Step 4: If no tool was chosen, fall back to a general text response.
+                            with timed("general_llm"):
+                                general_messages = conversations.build_messages(client_id, user_message, system_prompt="As a helpful AI assistant, provide a concise response to the user's latest message.")
+                                final_response = await scheduler.ainvoke(llm_general, general_messages, priority=INTERACTIVE)
+                            response_payload = {"content_type": "text", "payload": {"content": final_response.content}}
+                            conversations.record_turn(client_id, user_message, final_response.content)
+                            # An answer written with this client's history in the prompt can carry their
+                            # details ("Your name is Alice"), so only history-free answers are shared.
+                            if cacheable and not had_history:
+                                answer_cache.store(user_message, final_response.content)
+
+                    except Exception as e:
+                        print(traceback.format_exc())
+                        error_message = f"I encountered an error processing your request: {str(e)}"
+                        response_payload = {"content_type": "text", "payload": {"content": f"**Error:** {error_message}"}}
+
+                    # --- FIX: Simplified the final send message call ---
+                    with timed("serialize"):
+                        message = json.dumps(response_payload)
+                    with timed("ws_publish"):
+                        await manager.send_personal_message(message, client_id)
+                    RESPONSES.inc(content_type=response_payload.get("content_type", "text"))
 
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        manager.disconnect(client_id, websocket)
         print(f"Client '{client_id}' disconnected.")
     except Exception as e:
         print(f"An error occurred in websocket for client '{client_id}': {e}")
         traceback.print_exc()
-        manager.disconnect(client_id)
+        manager.disconnect(client_id, websocket)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Multiple workers need a shared broker, e.g. CONNECTION_BROKER_URL=redis://localhost:6379/0
+    # Keep-alive uses protocol-level WebSocket pings, which browsers answer without the frontend seeing them.
+    workers = worker_count()
+    # One worker serves this module's `app` directly. The "server:app" import string (needed for
+    # several workers) would import this file a second time, rebuilding every module-level object
+    # and restarting _PROCESS_START after fastapi/langchain are already loaded.
+    uvicorn.run(
+        app if workers == 1 else "server:app", host="0.0.0.0", port=8000,
+        workers=workers,
+        ws_ping_interval=float(os.environ.get("WS_PING_INTERVAL", "20")),
+        ws_ping_timeout=float(os.environ.get("WS_PING_TIMEOUT", "20")),
+    )
\ No newline at end of file
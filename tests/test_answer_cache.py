@@ -0,0 +1,90 @@
+# tests/test_answer_cache.py
+import pytest
+from answer_cache import AnswerCache, cache_key, is_self_contained
+
+# Questions that share almost every word but ask different things (or about someone else).
+ONE_WORD_APART = [
+    ("Explain how the immune system fights a bacterial infection in the human body",
+     "Explain how the immune system fights a viral infection in the human body"),
+    ("My manager and the rest of the team say the launch is going well",
+     "My manager and the rest of the team say the launch is going badly"),
+    ("What should I pack for a week long hiking trip in the mountains in summer",
+     "What should I pack for a week long hiking trip in the mountains in winter"),
+    ("Is it safe to take ibuprofen with coffee", "Is it not safe to take ibuprofen with coffee"),
+    ("What is 2+2?", "What is 2+3?"),
+    ("Convert 3.5 miles to km", "Convert 35 miles to km"),
+    ("What is my name?", "What is your name?"),
+    ("What is my account balance", "what is our account balance"),
+    ("Can I get a refund?", "Can you get a refund?"),
+    ("Does the dog chase the cat?", "Does the cat chase the dog?"),
+]
+
+
+@pytest.mark.parametrize("stored, asked", ONE_WORD_APART)
+def test_one_meaningful_word_apart_misses(stored, asked):
+    cache = AnswerCache()
+    cache.store(stored, "cached answer")
+    assert cache.lookup(asked) is None
+
+
+def test_another_users_pronouns_never_reach_their_answer():
+    cache = AnswerCache()
+    cache.store("What is my name?", "Your name is Alice.")
+    assert cache.lookup("What is your name?") is None
+    assert cache.lookup("what's our name") is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("What is the capital of France?", "what is the capital of france"),
+    ("What is the capital of France?", "What's the capital of France, please?"),
+    ("Hey, what is the capital of France?", "What is the capital of France?"),
+    ("Could you tell me the capital of France?", "Can you please tell me the capital of France?"),
+])
+def test_rewording_with_same_content_hits(stored, asked):
+    cache = AnswerCache()
+    cache.store(stored, "Paris")
+    assert cache.lookup(asked) == "Paris"
+    assert cache.stats()["hits"] == 1
+
+
+def test_keys_keep_content_words_in_order():
+    assert cache_key("What's the capital of France, please?") == "what capital france"
+    assert cache_key("Hi!") == "hi"
+
+
+def test_filler_only_queries_need_an_exact_match():
+    cache = AnswerCache()
+    cache.store("hi", "Hello!")
+    assert cache.lookup("thanks") is None
+    assert cache.lookup("Hi!") == "Hello!"
+
+
+def test_expired_entries_miss(monkeypatch):
+    cache = AnswerCache(ttl_seconds=10)
+    cache.store("What is the capital of France?", "Paris")
+    now = __import__("time").monotonic()
+    monkeypatch.setattr("answer_cache.time.monotonic", lambda: now + 11)
+    assert cache.lookup("What is the capital of France?") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.store("What is the capital of France?", "Paris")
+    cache.store("What is the capital of Spain?", "Madrid")
+    cache.lookup("What is the capital of France?")
+    cache.store("What is the capital of Italy?", "Rome")
+    assert cache.lookup("What is the capital of Spain?") is None
+    assert cache.lookup("What is the capital of France?") == "Paris"
+    assert cache.stats()["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What is the capital of France?", True),
+    ("now make it shorter", False),
+    ("And for Germany?", False),
+    ("what about the second one", False),
+    ("Explain that again", False),
+])
+def test_is_self_contained(query, expected):
+    assert is_self_contained(query) is expected
@@ -0,0 +1,71 @@
+# tests/test_conversation_memory.py
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from conversation_memory import ConversationStore, TOOL_ARG_CHARS
+
+
+def run_turns(store: ConversationStore, turns: list[tuple[str, str]], client_id: str = "client"):
+    async def main():
+        for user_message, reply in turns:
+            store.record_turn(client_id, user_message, reply)
+            compaction = store.get(client_id).compaction
+            if compaction:
+                await compaction
+    asyncio.run(main())
+    return store.get(client_id)
+
+
+def test_failing_summaries_keep_history_and_prompts_bounded():
+    transcripts = []
+
+    async def summarize(previous, transcript):
+        transcripts.append(transcript)
+        raise RuntimeError("rate limited")
+
+    store = ConversationStore(summarize, token_budget=200)
+    conversation = run_turns(store, [(f"question {i} " + "x" * 300, f"answer {i} " + "y" * 300) for i in range(50)])
+
+    assert conversation.turn_tokens() <= 200 * 2
+    assert conversation.turns[0][0] == "user"
+    assert max(len(t) for t in transcripts) <= 200 * 4
+
+
+def test_compaction_folds_whole_pairs():
+    async def summarize(previous, transcript):
+        return "summary"
+
+    store = ConversationStore(summarize, token_budget=100)
+    # Uneven sizes so the fold point would otherwise land between a question and its answer.
+    # 40+10, 10+10, 10+25 tokens: folding three turns gets under half the budget, mid-pair.
+    conversation = run_turns(store, [("q" * 156, "a" * 36), ("q" * 36, "a" * 36), ("q" * 36, "a" * 96)])
+
+    assert conversation.summary == "summary"
+    assert list(conversation.turns) == [("user", "q" * 36), ("assistant", "a" * 96)]
+
+
+def test_history_never_starts_with_an_orphaned_reply():
+    async def summarize(previous, transcript):
+        return ""
+
+    store = ConversationStore(summarize, token_budget=100)
+    conversation = store.get("client")
+    conversation.turns.extend([("user", "q" * 400), ("assistant", "a" * 40)])
+
+    messages = store.build_messages("client", "and then?")
+    assert not any(isinstance(m, AIMessage) for m in messages)
+    assert isinstance(messages[-1], HumanMessage)
+
+
+def test_tool_records_are_clipped_and_fit_the_budget():
+    async def summarize(previous, transcript):
+        return ""
+
+    store = ConversationStore(summarize, token_budget=400)
+    for _ in range(5):
+        store.record_tool_output("client", tool="content_summarizer_tool", args={"transcript_text": "z" * 40_000}, result="r" * 40_000)
+
+    record = store.get("client").tool_records[-1]
+    assert len(record["args"]["transcript_text"]) <= TOOL_ARG_CHARS + 3
+    system = store.build_messages("client", "summarize it again", system_prompt="Be concise.")[0]
+    assert isinstance(system, SystemMessage)
+    assert len(system.content) // 4 + 1 <= 400 // 2
@@ -0,0 +1,26 @@
+# tests/test_deployment.py
+import pytest
+from deployment import worker_count
+
+
+@pytest.mark.parametrize("argv, env, expected", [
+    (["server.py"], None, 1),
+    (["server.py"], "4", 4),
+    (["uvicorn", "server:app", "--workers", "3"], None, 3),
+    (["uvicorn", "server:app", "--host", "0.0.0.0", "--workers=2"], None, 2),
+    (["gunicorn", "-w", "4", "-k", "uvicorn.workers.UvicornWorker", "server:app"], "4", 4),
+])
+def test_worker_count(monkeypatch, argv, env, expected):
+    monkeypatch.setattr("sys.argv", argv)
+    if env is None:
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    else:
+        monkeypatch.setenv("WEB_CONCURRENCY", env)
+    assert worker_count() == expected
+
+
+def test_conflicting_worker_counts_are_refused(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["uvicorn", "server:app", "--workers", "4"])
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    with pytest.raises(ValueError):
+        worker_count()
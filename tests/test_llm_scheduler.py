@@ -0,0 +1,126 @@
+# tests/test_llm_scheduler.py
+import time
+import asyncio
+from types import SimpleNamespace
+import pytest
+import llm_scheduler
+from llm_scheduler import LLMScheduler, TokenBucket, INTERACTIVE, TOOL, BACKGROUND
+
+
+class FakeError(Exception):
+    def __init__(self, status_code: int, retry_after: str | None = None):
+        super().__init__(f"HTTP {status_code}")
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class FakeLLM:
+    """Answers with the prompt after `latency` seconds; raises the scripted errors first."""
+
+    def __init__(self, errors=(), latency: float = 0.0):
+        self.errors = list(errors)
+        self.latency = latency
+        self.calls: list[str] = []
+
+    async def ainvoke(self, prompt):
+        self.calls.append(prompt)
+        await asyncio.sleep(self.latency)
+        if self.errors:
+            raise self.errors.pop(0)
+        return prompt
+
+
+def make_scheduler(**overrides) -> LLMScheduler:
+    options = dict(requests_per_minute=6000, tokens_per_minute=10_000_000, max_concurrency=8,
+                   max_retries=3, base_delay=0.001, max_delay=0.01)
+    return LLMScheduler(**{**options, **overrides})
+
+
+async def submit_in_order(scheduler, calls, gap: float = 0.02):
+    """Submits (llm, prompt, priority) calls one after another, so each is queued before the next."""
+    tasks = []
+    for llm, prompt, priority in calls:
+        tasks.append(asyncio.create_task(scheduler.ainvoke(llm, prompt, priority=priority)))
+        await asyncio.sleep(gap)
+    return await asyncio.gather(*tasks)
+
+
+def test_token_bucket_refills_up_to_capacity_and_carries_debt(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(llm_scheduler.time, "monotonic", lambda: now[0])
+    bucket = TokenBucket(capacity=10, per_second=1)
+
+    bucket.consume(10)
+    assert bucket.time_until(5) == pytest.approx(5)
+    now[0] += 3
+    assert bucket.time_until(5) == pytest.approx(2)
+
+    # The real usage came in higher than estimated: the level goes negative and must be repaid.
+    bucket.consume(20)
+    assert bucket.level == pytest.approx(-17)
+    assert bucket.time_until(1) == pytest.approx(18)
+
+    now[0] += 1000
+    assert bucket.time_until(1) == 0.0
+    assert bucket.level == 10
+    # Requests larger than the bucket only wait for a full bucket instead of forever.
+    assert bucket.time_until(50) == 0.0
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_errors_are_retried(status):
+    llm = FakeLLM(errors=[FakeError(status), FakeError(status)])
+    assert make_scheduler().invoke(llm, "hello", priority=INTERACTIVE) == "hello"
+    assert len(llm.calls) == 3
+
+
+def test_client_errors_are_not_retried():
+    llm = FakeLLM(errors=[FakeError(400)])
+    with pytest.raises(FakeError):
+        make_scheduler().invoke(llm, "hello", priority=INTERACTIVE)
+    assert len(llm.calls) == 1
+
+
+def test_retries_stop_after_max_retries():
+    llm = FakeLLM(errors=[FakeError(500)] * 10)
+    with pytest.raises(FakeError):
+        make_scheduler(max_retries=2).invoke(llm, "hello", priority=INTERACTIVE)
+    assert len(llm.calls) == 3
+
+
+def test_retry_after_is_honoured_and_pauses_the_queue():
+    scheduler = make_scheduler()
+    llm = FakeLLM(errors=[FakeError(429, retry_after="0.3")])
+    start = time.monotonic()
+    assert scheduler.invoke(llm, "hello", priority=INTERACTIVE) == "hello"
+    assert time.monotonic() - start >= 0.3
+    assert scheduler._paused_until >= start + 0.3
+
+
+def test_identical_inflight_prompts_share_one_request():
+    llm = FakeLLM(latency=0.2)
+    scheduler = make_scheduler()
+
+    async def main():
+        return await asyncio.gather(*(scheduler.ainvoke(llm, "same prompt") for _ in range(5)))
+
+    assert asyncio.run(main()) == ["same prompt"] * 5
+    assert llm.calls == ["same prompt"]
+
+
+def test_higher_priority_runs_first():
+    llm = FakeLLM()
+    scheduler = make_scheduler(max_concurrency=1)
+    scheduler._paused_until = time.monotonic() + 0.3  # hold the queue until everything is waiting
+
+    asyncio.run(submit_in_order(scheduler, [(llm, "background", BACKGROUND), (llm, "tool", TOOL), (llm, "interactive", INTERACTIVE)]))
+    assert llm.calls == ["interactive", "tool", "background"]
+
+
+def test_merged_interactive_caller_raises_the_pending_priority():
+    llm = FakeLLM()
+    scheduler = make_scheduler(max_concurrency=1)
+    scheduler._paused_until = time.monotonic() + 0.3
+
+    asyncio.run(submit_in_order(scheduler, [(llm, "shared", BACKGROUND), (llm, "tool", TOOL), (llm, "shared", INTERACTIVE)]))
+    assert llm.calls == ["shared", "tool"]
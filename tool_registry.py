@@ -0,0 +1,108 @@
+# tool_registry.py
+import os
+import time
+import threading
+import importlib
+import traceback
+from types import ModuleType
+from typing import Iterable
+
+# --- Which module backs each tool ---
+# The tool modules pull in statsmodels, sklearn, moviepy, PIL, vosk, etc. at import
+# time, so server.py only imports them through the registry when a tool first runs.
+TOOL_MODULES = {
+    "financial_forecasting_tool": "mcp_servers.forecasting_server",
+    "crm_follow_up_tool": "mcp_servers.crm_server",
+    "crm_logging_tool": "mcp_servers.crm_server",
+    "video_creator_tool": "mcp_servers.video_server",
+    "flowchart_agent_tool": "mcp_servers.flowchart_server",
+    "freelance_proposal_tool": "mcp_servers.freelance_server",
+    "content_summarizer_tool": "mcp_servers.summarizer_server",
+    "customer_support_tool": "mcp_servers.support_server",
+    "virtual_employee_tool": "mcp_servers.virtual_employee_server",
+    "inbox_zero_tool": "mcp_servers.inbox_server",
+    "onboarding_bot_tool": "mcp_servers.onboarding_server",
+}
+
+
+class LazyModuleRegistry:
+    """Imports tool modules on first use and records how long each import took."""
+
+    def __init__(self):
+        self._modules: dict[str, ModuleType] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self.import_times: dict[str, float] = {}
+        self.import_errors: dict[str, str] = {}
+        self.startup_seconds: float | None = None
+
+    def load(self, module_name: str) -> ModuleType:
+        module = self._modules.get(module_name)
+        if module is not None:
+            return module
+
+        # One lock per module so a slow import (e.g. moviepy) doesn't block lighter tools.
+        with self._locks.setdefault(module_name, threading.Lock()):
+            if module_name in self._modules:
+                return self._modules[module_name]
+            start = time.perf_counter()
+            try:
+                module = importlib.import_module(module_name)
+            except Exception as e:
+                self.import_errors[module_name] = str(e)
+                raise
+            elapsed = time.perf_counter() - start
+            self.import_times[module_name] = elapsed
+            self.import_errors.pop(module_name, None)
+            self._modules[module_name] = module
+            print(f"📦 Loaded '{module_name}' in {elapsed:.2f}s")
+            return module
+
+    def warm_up(self, module_names: Iterable[str]) -> threading.Thread:
+        """Imports the given modules in a daemon thread so first requests don't pay for them."""
+        pending = list(dict.fromkeys(module_names))
+
+        def _run():
+            start = time.perf_counter()
+            for module_name in pending:
+                try:
+                    self.load(module_name)
+                except Exception:
+                    print(f"⚠️ Warm-up failed for '{module_name}':")
+                    traceback.print_exc()
+            print(f"✅ Tool warm-up finished in {time.perf_counter() - start:.2f}s ({len(pending)} modules).")
+
+        thread = threading.Thread(target=_run, name="tool-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        return {
+            "startup_seconds": self.startup_seconds,
+            "loaded_modules": sorted(self._modules),
+            "import_seconds": {name: round(t, 4) for name, t in self.import_times.items()},
+            "import_errors": dict(self.import_errors),
+        }
+
+
+def enabled_tool_names() -> set[str] | None:
+    """
+    Reads the ENABLED_TOOLS env var (comma-separated tool names).
+    Returns None when unset, meaning every tool is enabled. An empty value disables all tools,
+    which gives a chat-only server. Unknown names raise, so a typo can't silently drop a tool.
+    """
+    raw = os.environ.get("ENABLED_TOOLS")
+    if raw is None:
+        return None
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = names - TOOL_MODULES.keys()
+    if unknown:
+        raise ValueError(f"Unknown tool name(s) in ENABLED_TOOLS: {', '.join(sorted(unknown))}. "
+                         f"Valid names: {', '.join(sorted(TOOL_MODULES))}")
+    return names
+
+
+def warmup_enabled() -> bool:
+    return os.environ.get("TOOL_WARMUP", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+registry = LazyModuleRegistry()